@@ -9,8 +9,12 @@ import os
 import logging
 import requests
 import pickle
+import threading
 import time
+from requests.adapters import HTTPAdapter
 from requests.cookies import RequestsCookieJar
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
 import json
 
 from codequick import Script
@@ -27,6 +31,9 @@ USER_AGENT_VERSION = '118.0'
 
 logger = logging.getLogger('.'.join((logger_id, __name__.split('.', 2)[-1])))
 
+# Requests may be made from multiple threads, but only one can write the cookie file at a time.
+_cookie_file_lock = threading.Lock()
+
 
 class PersistentCookieJar(RequestsCookieJar):
     def __init__(self, filename, policy=None):
@@ -35,13 +42,15 @@ class PersistentCookieJar(RequestsCookieJar):
         self._has_changed = False
 
     def save(self):
-        if not self._has_changed:
-            return
-        self.clear_expired_cookies()
-        self._has_changed = False
-        with open(self.filename, 'wb') as f:
-            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
-        logger.info("Saved cookies to file %s", self.filename)
+        # Also hold the jar's own lock, so other threads cannot change cookies while they are being pickled.
+        with _cookie_file_lock, self._cookies_lock:
+            if not self._has_changed:
+                return
+            self.clear_expired_cookies()
+            self._has_changed = False
+            with open(self.filename, 'wb') as f:
+                pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+            logger.info("Saved cookies to file %s", self.filename)
 
     def set_cookie(self, cookie, *args, **kwargs):
         super(PersistentCookieJar, self).set_cookie(cookie, *args, **kwargs)
@@ -58,19 +67,36 @@ class PersistentCookieJar(RequestsCookieJar):
             pass
 
 
+class _StaleConnectionRetry(Retry):
+    """Retry requests that failed because the server had closed an idle connection.
+
+    Timeouts are not retried, they fail in the same way as they would without retries.
+
+    """
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if isinstance(error, ReadTimeoutError):
+            raise error.with_traceback(_stacktrace)
+        return super(_StaleConnectionRetry, self).increment(method, url, response, error, _pool, _stacktrace)
+
+
 class HttpSession(requests.sessions.Session):
     instance = None
+    _lock = threading.Lock()
 
     def __new__(cls):
-        if cls.instance is None:
-            cls.instance = super(HttpSession, cls).__new__(cls)
+        # Several threads may request the session at the same time, ensure only one instance is created and initialised.
+        with cls._lock:
+            if cls.instance is None:
+                instance = super(HttpSession, cls).__new__(cls)
+                instance._initialise()
+                cls.instance = instance
         return cls.instance
 
     def __init__(self):
-        if hasattr(self, 'cookies'):
-            # prevent re-initialization when __new__ returns an existing instance
-            return
+        # The instance has already been initialised by __new__().
+        pass
 
+    def _initialise(self):
         super(HttpSession, self).__init__()
         self.headers.update({
             'User-Agent': USER_AGENT,
@@ -83,6 +109,12 @@ class HttpSession(requests.sessions.Session):
             'Pragma': 'no-cache',
         })
         self.cookies = _create_cookiejar()
+        # Connections are kept open for reuse, but servers may close them while idle.
+        # Retry once when that happens; by default urllib3 only retries idempotent methods.
+        # Failures to connect are not retried.
+        adapter = HTTPAdapter(max_retries=_StaleConnectionRetry(total=1, connect=0, read=1))
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
 
     # noinspection PyShadowingNames
     def request(
@@ -224,8 +256,6 @@ def web_request(method, url, headers=None, data=None, **kwargs):
     except requests.RequestException as e:
         logger.error('Error connecting to %s: %r', url, e)
         raise FetchError(str(e)) from None
-    finally:
-        http_session.close()
 
 
 def post_json(url, data, headers=None, **kwargs):
@@ -235,7 +265,7 @@ def post_json(url, data, headers=None, **kwargs):
         dflt_headers.update(headers)
     resp = web_request('POST', url, dflt_headers, data, **kwargs)
     try:
-        return resp.json()
+        return utils.json_loads(resp.content)
     except json.JSONDecodeError:
         raise FetchError(Script.localize(30920))
 
@@ -249,7 +279,7 @@ def get_json(url, headers=None, **kwargs):
     if resp.status_code == 204:     # No Content
         return None
     try:
-        return resp.json()
+        return utils.json_loads(resp.content)
     except json.JSONDecodeError:
         raise FetchError(Script.localize(30920))
 
@@ -270,7 +300,7 @@ def delete_json(url, data, headers=None, **kwargs):
     if resp.status_code == 204:     # No Content
         return None
     try:
-        return resp.json()
+        return utils.json_loads(resp.content)
     except json.JSONDecodeError:
         raise FetchError(Script.localize(30920))
 
@@ -283,3 +313,11 @@ def get_document(url, headers=None, **kwargs):
     resp = web_request('GET', url, headers, **kwargs)
     resp.encoding = 'utf8'
     return resp.text
+
+
+def get_document_bytes(url, headers=None, **kwargs):
+    """GET any document and return the contents as bytes, exactly as received.
+    It may be necessary to provide and 'Accept' header.
+    """
+    resp = web_request('GET', url, headers, **kwargs)
+    return resp.content
@@ -8,7 +8,7 @@
 import os
 import logging
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import pytz
 import xbmc
 
@@ -22,15 +22,17 @@ from . import kodi_utils
 
 logger = logging.getLogger(logger_id + '.itv')
 
+UK_TZ = pytz.timezone('Europe/London')
+
 
 def get_live_schedule(hours=4, local_tz=None):
     """Get the schedule of the live channels from now up to the specified number of hours.
 
     """
     if local_tz is None:
-        local_tz = pytz.timezone('Europe/London')
-    btz = pytz.timezone('Europe/London')
-    british_now = datetime.now(pytz.utc).astimezone(btz)
+        local_tz = UK_TZ
+    btz = UK_TZ
+    british_now = datetime.now(timezone.utc).astimezone(btz)
 
     # Request TV schedules for the specified number of hours from now, in british time
     from_date = british_now.strftime('%Y%m%d%H%M')
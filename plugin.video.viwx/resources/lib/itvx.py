@@ -6,11 +6,9 @@
 #  See LICENSE.txt
 # ----------------------------------------------------------------------------------------------------------------------
 
-import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
-import pytz
-import requests
 import xbmc
 
 from datetime import datetime, timezone
@@ -22,8 +20,9 @@ from . import fetch
 from . import parsex
 from . import cache
 from . import itv_account
+from . import utils
 
-from .itv import get_live_schedule
+from .itv import get_live_schedule, UK_TZ
 
 
 logger = logging.getLogger(logger_id + '.itvx')
@@ -48,7 +47,7 @@ def get_page_data(url, cache_time=None):
         if cached_data:
             return cached_data
 
-    html_doc = fetch.get_document(url)
+    html_doc = fetch.get_document_bytes(url)
     data = parsex.scrape_json(html_doc)
     if cache_time:
         cache.set_item(url, data, cache_time)
@@ -61,9 +60,8 @@ def get_now_next_schedule(local_tz=None):
     Present start time conform Kodi's time zone setting.
     """
     if local_tz is None:
-        local_tz = pytz.timezone('Europe/London')
+        local_tz = UK_TZ
 
-    utc_tz = pytz.utc
     # Use local time format without seconds. Fix weird kodi formatting for 12-hour clock.
     time_format = xbmc.getRegion('time').replace(':%S', '').replace('%I%I:', '%I:')
 
@@ -93,8 +91,7 @@ def get_now_next_schedule(local_tz=None):
                 # In practice, if displayTitle is None, everything else is as well.
                 continue
 
-            start_t = prog['start'][:19]
-            utc_start = datetime(*(time.strptime(start_t, '%Y-%m-%dT%H:%M:%S')[0:6]), tzinfo=utc_tz)
+            utc_start = datetime.fromisoformat(prog['start'][:19]).replace(tzinfo=timezone.utc)
 
             programs_list.append({
                 'programme_details': details,
@@ -121,27 +118,34 @@ def get_live_channels(local_tz=None):
         return cached_schedule
 
     if local_tz is None:
-        local_tz = pytz.timezone('Europe/London')
+        local_tz = UK_TZ
 
-    schedule = get_now_next_schedule(local_tz)
-    main_schedule = get_live_schedule(6, local_tz=local_tz)
+    # Both schedules come from different web services, request them simultaneously.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        main_schedule_future = executor.submit(get_live_schedule, 6, local_tz=local_tz)
+        schedule = get_now_next_schedule(local_tz)
+        main_schedule = main_schedule_future.result()
 
     # Replace the schedule of the main channels with the longer one obtained from get_live_schedule().
+    # Caution, might get broken when ITV becomes ITV1 everywhere.
+    # Should a channel name occur more than once, use the first schedule of that channel.
+    main_slots = {}
+    for main_chan in main_schedule:
+        main_slots.setdefault(main_chan['channel']['name'], main_chan['slot'])
     for channel in schedule:
         # The itv main live channels get their schedule from the full live schedule.
         if channel['channelType'] == 'simulcast':
-            chan_id = channel['id']
-            for main_chan in main_schedule:
-                # Caution, might get broken when ITV becomes ITV1 everywhere.
-                if main_chan['channel']['name'] == chan_id:
-                    channel['slot'] = main_chan['slot']
-                    break
+            slots = main_slots.get(channel['id'])
+            if slots is not None:
+                channel['slot'] = slots
     cache.set_item('live_schedule', schedule, expire_time=240)
     return schedule
 
 
 def main_page_items():
-    main_data = get_page_data('https://www.itv.com', cache_time=None)
+    # The main page is also cached for an hour by collection_content() and
+    # list_collections(), use the same expiry time.
+    main_data = get_page_data('https://www.itv.com', cache_time=3600)
 
     hero_content = main_data.get('heroContent')
     if hero_content:
@@ -170,7 +174,6 @@ def collection_content(url=None, slider=None, hide_paid=False):
     is not None, return the contents of that particular slider on the collection page.
 
     """
-    uk_tz = pytz.timezone('Europe/London')
     time_fmt = ' '.join((xbmc.getRegion('dateshort'), xbmc.getRegion('time')))
     is_main_page = url == 'https://www.itv.com'
 
@@ -181,7 +184,7 @@ def collection_content(url=None, slider=None, hide_paid=False):
         if slider == 'shortFormSlider':
             # return the items from the shortFormSlider on a collection page.
             for item in page_data['shortFormSlider']['items']:
-                yield parsex.parse_shortform_item(item, uk_tz, time_fmt)
+                yield parsex.parse_shortform_item(item, UK_TZ, time_fmt)
             return
 
         elif slider == 'shortFormSliderContent':
@@ -190,7 +193,7 @@ def collection_content(url=None, slider=None, hide_paid=False):
             for slider in page_data['shortFormSliderContent']:
                 if slider['key'] == 'newsShortForm':
                     for news_item in slider['items']:
-                        yield parsex.parse_shortform_item(news_item, uk_tz, time_fmt, hide_paid)
+                        yield parsex.parse_shortform_item(news_item, UK_TZ, time_fmt, hide_paid)
             return
 
         elif slider == 'trendingSliderContent':
@@ -268,8 +271,9 @@ def episodes(url, use_cache=False):
         return legacy_episodes(url)
     programme_id = programme.get('encodedProgrammeId', {}).get('underscore')
     programme_title = programme['title']
-    programme_thumb = programme['image'].format(**parsex.IMG_PROPS_THUMB)
-    programme_fanart = programme['image'].format(**parsex.IMG_PROPS_FANART)
+    img_tpl = programme['image']
+    programme_thumb = img_tpl.format_map(parsex.IMG_PROPS_THUMB)
+    programme_fanart = img_tpl.format_map(parsex.IMG_PROPS_FANART)
     description  = programme.get('longDescription') or programme.get('description') or programme_title
     if 'FREE' in programme['tier']:
         brand_description = description
@@ -284,6 +288,7 @@ def episodes(url, use_cache=False):
     # Midsummer murder for instance has had 2 series with seriesNumber 4
     # By using this mapping, setdefault() and extend() on the episode list, series with the same
     # seriesNumber are automatically merged.
+    parse_episode = parsex.parse_episode_title
     series_map = {}
     for series in series_data:
         title = series['seriesLabel']
@@ -294,8 +299,8 @@ def episodes(url, use_cache=False):
                     'label': title,
                     'art': {'thumb': programme_thumb, 'fanart': programme_fanart},
                     # TODO: add more info, like series number, number of episodes
-                    'info': {'title': '[B]{} - {}[/B]'.format(programme_title, title),
-                             'plot': '{}\n\n{} - {} episodes'.format(
+                    'info': {'title': '[B]%s - %s[/B]' % (programme_title, title),
+                             'plot': '%s\n\n%s - %s episodes' % (
                                  brand_description, title, series['numberOfAvailableEpisodes'])},
 
                     'params': {'url': url, 'series_idx': series_idx}
@@ -303,7 +308,7 @@ def episodes(url, use_cache=False):
                 'episodes': []
             })
         series_obj['episodes'].extend(
-            [parsex.parse_episode_title(episode, programme_fanart) for episode in series['titles']])
+            parse_episode(episode, programme_fanart) for episode in series['titles'])
 
     programme_data = {'programme_id': programme_id, 'series_map': series_map}
     cache.set_item(url, programme_data, expire_time=1800)
@@ -318,8 +323,9 @@ def legacy_episodes(url):
     """
     brand_data = get_page_data(url, cache_time=0)['title']['brand']
     brand_title = brand_data['title']
-    brand_thumb = brand_data['imageUrl'].format(**parsex.IMG_PROPS_THUMB)
-    brand_fanart = brand_data['imageUrl'].format(**parsex.IMG_PROPS_FANART)
+    img_tpl = brand_data['imageUrl']
+    brand_thumb = img_tpl.format_map(parsex.IMG_PROPS_THUMB)
+    brand_fanart = img_tpl.format_map(parsex.IMG_PROPS_FANART)
     if 'FREE' in brand_data['tier']:
         brand_description = brand_data['synopses'].get('ninety', '')
     else:
@@ -333,6 +339,7 @@ def legacy_episodes(url):
     # Midsummer murder for instance has 2 series with seriesNumber 4
     # By using this mapping, setdefault() and extend() on the episode list, series with the same
     # seriesNumber are automatically merged.
+    parse_episode = parsex.parse_legacy_episode_title
     series_map = {}
     for series in series_data:
         title = series['title']
@@ -343,8 +350,8 @@ def legacy_episodes(url):
                     'label': title,
                     'art': {'thumb': brand_thumb, 'fanart': brand_fanart},
                     # TODO: add more info, like series number, number of episodes
-                    'info': {'title': '[B]{} - {}[/B]'.format(brand_title, series['title']),
-                             'plot': '{}\n\n{} - {} episodes'.format(
+                    'info': {'title': '[B]%s - %s[/B]' % (brand_title, title),
+                             'plot': '%s\n\n%s - %s episodes' % (
                                  brand_description, title, series['seriesAvailableEpisodeCount'])},
 
                     'params': {'url': url, 'series_idx': series_idx}
@@ -352,7 +359,7 @@ def legacy_episodes(url):
                 'episodes': []
             })
         series_obj['episodes'].extend(
-            [parsex.parse_legacy_episode_title(episode, brand_fanart) for episode in series['episodes']])
+            parse_episode(episode, brand_fanart) for episode in series['episodes'])
     cache.set_item(url, {'programme_id': None, 'series_map': series_map}, expire_time=1800)
     return series_map, None
 
@@ -402,7 +409,6 @@ def category_news_content(url, sub_cat, rail=None, hide_paid=False):
     page_data = get_page_data(url, cache_time=900)
     news_sub_cats = page_data['data']
 
-    uk_tz = pytz.timezone('Europe/London')
     time_fmt = ' '.join((xbmc.getRegion('dateshort'), xbmc.getRegion('time')))
 
     # A normal listing of TV shows in the category News, like normal category content
@@ -427,11 +433,11 @@ def category_news_content(url, sub_cat, rail=None, hide_paid=False):
         return []
 
     if hide_paid:
-        return [parsex.parse_shortform_item(news_item, uk_tz, time_fmt)
+        return [parsex.parse_shortform_item(news_item, UK_TZ, time_fmt)
                 for news_item in items_list
                 if not news_item.get('isPaid')]
     else:
-        return [parsex.parse_shortform_item(news_item, uk_tz, time_fmt)
+        return [parsex.parse_shortform_item(news_item, UK_TZ, time_fmt)
                 for news_item in items_list]
 
 
@@ -462,24 +468,27 @@ def search(search_term, hide_paid=False):
           'playready,widevine,fairplay,bbts,progressive,hd,rtmpe&onlyFree={}&platform=ctv&query={}'.format(
         str(hide_paid).lower(), quote(search_term))
     headers = {
-        'User-Agent': fetch.USER_AGENT,
         'accept': 'application/json',
-        'Origin': 'https://www.itv.com',
-        'Referer': 'https://www.itv.com/',
         'accept-language': 'en-GB,en;q=0.5',
-        'Sec-Fetch-Dest': 'empty',
-        'Sec-Fetch-Mode': 'cors',
-        'Sec-Fetch-Site': 'same-site',
     }
-    resp = requests.get(url, headers=headers, timeout=fetch.WEB_TIMEOUT)
+    try:
+        # Use the shared HTTP session, so successive searches can reuse an open connection.
+        resp = fetch.web_request('GET', url, headers=headers)
+    except (errors.HttpError, errors.AuthenticationError,
+            errors.GeoRestrictedError, errors.AccessRestrictedError) as err:
+        # Any HTTP error status. Connection errors are not caught.
+        logger.debug("Search for '%s' (hide_paid=%s) failed: %r", search_term, hide_paid, err)
+        return None
 
+    # Errors have been handled above, but successful responses other than 200, like
+    # 204 - No Content, have no results either.
     if resp.status_code != 200:
-        logger.debug("Search for '%s' (hide_paid=%s) failed with HTTP status %s",
+        logger.debug("Search for '%s' (hide_paid=%s) returned HTTP status %s",
                      search_term, hide_paid, resp.status_code)
         return None
 
     try:
-        data = resp.json()
+        data = utils.json_loads(resp.content)
     except:
         logger.warning("Search for '%s' (hide_paid=%s) returned non-json content: '%s'",
                        search_term, hide_paid, resp.content)
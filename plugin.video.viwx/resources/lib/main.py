@@ -12,6 +12,7 @@ import sys
 
 import pytz
 import requests
+from tzlocal import get_localzone
 import xbmc
 import xbmcplugin
 from xbmcgui import ListItem
@@ -248,15 +249,30 @@ def generic_list(addon, list_type='mylist', filter_char=None, page_nr=0):
     yield from Paginator(shows_list, filter_char, page_nr)
 
 
-@Route.register(content_type='videos')
-def sub_menu_live(_):
+_local_tz = None
+
+
+def _get_local_tz():
+    """Return the time zone set in Kodi, or the system's local time zone if
+    Kodi's setting is not available.
+
+    The system's time zone is determined only once per session, since tzlocal
+    has to inspect the OS' configuration files to find it.
+
+    """
+    global _local_tz
     try:
-        local_tz = pytz.timezone(kodi_utils.get_system_setting('locale.timezone'))
+        return pytz.timezone(kodi_utils.get_system_setting('locale.timezone'))
     except ValueError:
         # To be Matrix compatible
-        from tzlocal import get_localzone
-        local_tz = get_localzone()
+        if _local_tz is None:
+            _local_tz = get_localzone()
+        return _local_tz
+
 
+@Route.register(content_type='videos')
+def sub_menu_live(_):
+    local_tz = _get_local_tz()
     tv_schedule = itvx.get_live_channels(local_tz)
 
     for item in tv_schedule:
@@ -8,8 +8,8 @@
 
 import json
 import logging
-import pytz
-from datetime import datetime
+import re
+from datetime import datetime, timezone
 
 from codequick.support import logger_id
 
@@ -34,6 +34,8 @@ IMG_PROPS_FANART = {'treatment': '', 'aspect_ratio': '16x9', 'class': '01_Hero_D
 
 url_trans_table = str.maketrans(' ', '-', '#/?:\'')
 
+next_data_re = re.compile(rb'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', flags=re.DOTALL)
+
 
 def build_url(programme, programme_id, episode_id=None):
     progr_slug = (programme.lower()
@@ -49,7 +51,7 @@ def build_url(programme, programme_id, episode_id=None):
 
 def premium_plot(plot: str):
     """Add a notice of paid or premium content tot the plot."""
-    return '\n'.join(('[COLOR yellow]itvX premium[/COLOR]', plot))
+    return '[COLOR yellow]itvX premium[/COLOR]\n' + plot
 
 
 def sort_title(title: str):
@@ -63,15 +65,21 @@ def sort_title(title: str):
 
 def scrape_json(html_page):
     # noinspection GrazieInspection
-    """Return the json data embedded in a script tag on an html page"""
-    import re
-    result = re.search(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', html_page, flags=re.DOTALL)
+    """Return the json data embedded in a script tag on an html page
+
+    Preferably pass the page as the raw UTF-8 encoded bytes obtained from the web, so
+    the page does not have to be decoded in full just to get the json data from it.
+
+    """
+    if isinstance(html_page, str):
+        html_page = html_page.encode('utf8')
+    result = next_data_re.search(html_page)
     if result:
-        json_str = result[1]
+        json_data = result[1]
         try:
-            data = json.loads(json_str)
+            data = utils.json_loads(json_data)
             return data['props']['pageProps']
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+        except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError) as e:
             logger.warning("__NEXT_DATA__ in HTML page has unexpected format: %r", e)
             raise ParseError('Invalid data received')
     raise ParseError('No data available')
@@ -92,14 +100,14 @@ def parse_hero_content(hero_data):
 
         item = {
             'label': title,
-            'art': {'thumb': hero_data['imageTemplate'].format(**IMG_PROPS_THUMB),
-                    'fanart': hero_data['imageTemplate'].format(**IMG_PROPS_FANART)},
+            'art': {'thumb': hero_data['imageTemplate'].format_map(IMG_PROPS_THUMB),
+                    'fanart': hero_data['imageTemplate'].format_map(IMG_PROPS_FANART)},
             'info': {'title': ''.join(('[B][COLOR orange]', title, '[/COLOR][/B]'))}
         }
 
         brand_img = hero_data.get('brandImageTemplate')
         if brand_img:
-            item['art']['fanart'] = brand_img.format(**IMG_PROPS_FANART)
+            item['art']['fanart'] = brand_img.format_map(IMG_PROPS_FANART)
 
         if item_type in ('simulcastspot', 'fastchannelspot'):
             item['params'] = {'channel': hero_data['channel'], 'url': None}
@@ -213,8 +221,8 @@ def parse_collection_item(show_data, hide_paid=False):
 
         programme_item = {
             'label': title,
-            'art': {'thumb': show_data['imageTemplate'].format(**IMG_PROPS_THUMB),
-                    'fanart': show_data['imageTemplate'].format(**IMG_PROPS_FANART)},
+            'art': {'thumb': show_data['imageTemplate'].format_map(IMG_PROPS_THUMB),
+                    'fanart': show_data['imageTemplate'].format_map(IMG_PROPS_FANART)},
             'info': {'title': title if is_playable else '[B]{}[/B] {}'.format(title, content_info),
                      'plot': plot,
                      'sorttitle': sort_title(title)},
@@ -229,7 +237,7 @@ def parse_collection_item(show_data, hide_paid=False):
                                         show_data.get('encodedEpisodeId', {}).get('letterA'))}
 
         if 'FILMS' in show_data.get('categories', ''):
-            programme_item['art']['poster'] = show_data['imageTemplate'].format(**IMG_PROPS_POSTER)
+            programme_item['art']['poster'] = show_data['imageTemplate'].format_map(IMG_PROPS_POSTER)
 
         if is_playable:
             programme_item['info']['duration'] = utils.duration_2_seconds(content_info)
@@ -263,7 +271,7 @@ def parse_shortform_item(item_data, time_zone, time_fmt, hide_paid=False):
             url = ''.join(('https://www.itv.com', href, '/', item_data['episodeId']))
 
         # dateTime field occasionally has milliseconds. Strip these when present.
-        item_time = pytz.UTC.localize(utils.strptime(item_data['dateTime'][:19], '%Y-%m-%dT%H:%M:%S'))
+        item_time = datetime.fromisoformat(item_data['dateTime'][:19]).replace(tzinfo=timezone.utc)
         loc_time = item_time.astimezone(time_zone)
         title = item_data.get('episodeTitle')
         plot = '\n'.join((loc_time.strftime(time_fmt), item_data.get('synopsis', title)))
@@ -280,7 +288,7 @@ def parse_shortform_item(item_data, time_zone, time_fmt, hide_paid=False):
             'type': 'title',
             'show': {
                 'label': title,
-                'art': {'thumb': item_data['imageUrl'].format(**IMG_PROPS_THUMB)},
+                'art': {'thumb': item_data['imageUrl'].format_map(IMG_PROPS_THUMB)},
                 'info': {'plot': plot, 'sorttitle': sort_title(title), 'duration': item_data.get('duration')},
                 'params': {'url': url}
             }
@@ -315,7 +323,7 @@ def parse_trending_collection_item(trending_item, hide_paid=False):
             'programme_id': trending_item['encodedProgrammeId']['underscore'],
             'show': {
                 'label': trending_item['title'],
-                'art': {'thumb': trending_item['imageUrl'].format(**IMG_PROPS_THUMB)},
+                'art': {'thumb': trending_item['imageUrl'].format_map(IMG_PROPS_THUMB)},
                 'info': {'plot': plot, 'sorttitle': sort_title(trending_item['title'])},
                 'params': {'url': build_url(trending_item['titleSlug'],
                                             trending_item['encodedProgrammeId']['letterA'],
@@ -343,6 +351,7 @@ def parse_category_item(prog, category_id):
     is_playable = prog['encodedEpisodeId']['letterA'] == ''
     playtime = utils.duration_2_seconds(prog['contentInfo'])
     title = prog['title']
+    img_tpl = prog['imageTemplate']
 
     if 'FREE' in prog['tier']:
         plot = prog['description']
@@ -351,8 +360,8 @@ def parse_category_item(prog, category_id):
 
     programme_item = {
         'label': title,
-        'art': {'thumb': prog['imageTemplate'].format(**IMG_PROPS_THUMB),
-                'fanart': prog['imageTemplate'].format(**IMG_PROPS_FANART)},
+        'art': {'thumb': img_tpl.format_map(IMG_PROPS_THUMB),
+                'fanart': img_tpl.format_map(IMG_PROPS_FANART)},
         'info': {'title': title if is_playable
                           else '[B]{}[/B] {}'.format(title, prog['contentInfo'] if not playtime else ''),
                  'plot': plot,
@@ -362,7 +371,7 @@ def parse_category_item(prog, category_id):
     # Currently the films category has id 'FILM' while in other data the plural 'FILMS' is used.
     # Ensure a future change to 'FILMS' will not break the add-on again.
     if category_id and 'FILM' in category_id:
-        programme_item['art']['poster'] = prog['imageTemplate'].format(**IMG_PROPS_POSTER)
+        programme_item['art']['poster'] = img_tpl.format_map(IMG_PROPS_POSTER)
 
     if is_playable:
         programme_item['info']['duration'] = playtime
@@ -395,8 +404,8 @@ def parse_item_type_collection(item_data):
     title = item_data['title']
     item = {
         'label': title,
-        'art': {'thumb': item_data['imageTemplate'].format(**IMG_PROPS_THUMB),
-                'fanart': item_data['imageTemplate'].format(**IMG_PROPS_FANART)},
+        'art': {'thumb': item_data['imageTemplate'].format_map(IMG_PROPS_THUMB),
+                'fanart': item_data['imageTemplate'].format_map(IMG_PROPS_FANART)},
         'info': {'title': '[B]{}[/B]'.format(title),
                  'plot': item_data.get('ctaLabel', 'Collection'),
                  'sorttitle': sort_title(title)},
@@ -426,9 +435,9 @@ def parse_episode_title(title_data, brand_fanart=None):
 
     title_obj = {
         'label': title,
-        'art': {'thumb': img_url.format(**IMG_PROPS_THUMB),
+        'art': {'thumb': img_url.format_map(IMG_PROPS_THUMB),
                 'fanart': brand_fanart,
-                # 'poster': img_url.format(**IMG_PROPS_POSTER)
+                # 'poster': img_url.format_map(IMG_PROPS_POSTER)
                 },
         'info': {'title': info_title,
                  'plot': plot,
@@ -454,9 +463,9 @@ def parse_legacy_episode_title(title_data, brand_fanart=None):
 
     title_obj = {
         'label': title,
-        'art': {'thumb': img_url.format(**IMG_PROPS_THUMB),
+        'art': {'thumb': img_url.format_map(IMG_PROPS_THUMB),
                 'fanart': brand_fanart,
-                # 'poster': img_url.format(**IMG_PROPS_POSTER)
+                # 'poster': img_url.format_map(IMG_PROPS_POSTER)
                 },
         'info': {'title': title_data['numberedEpisodeTitle'],
                  'plot': plot,
@@ -525,7 +534,7 @@ def parse_search_result(search_data):
         'programme_id': api_prod_id,
         'show': {
             'label': prog_name,
-            'art': {'thumb': img_url.format(**IMG_PROPS_THUMB)},
+            'art': {'thumb': img_url.format_map(IMG_PROPS_THUMB)},
             'info': {'plot': plot,
                      'title': title},
             'params': {'url': build_url(prog_name, api_prod_id.replace('_', 'a'), api_episode_id.replace('/', 'a'))}
@@ -548,15 +557,16 @@ def parse_my_list_item(item, hide_paid=False):
         num_episodes = item['numberOfEpisodes']
         content_info = ' - {} episodes'.format(num_episodes) if num_episodes is not None else ''
         img_link = item.get('itvxImageLink') or item.get('itvxImageUrl')
-        is_playable = item['contentType'].lower() != 'programme'
+        content_type = item['contentType'].lower()
+        is_playable = content_type != 'programme'
 
         item_dict = {
-            'type': item['contentType'].lower(),
+            'type': content_type,
             'programme_id': progr_id,
             'show': {
                 'label': progr_name,
-                'art': {'thumb': img_link.format(**IMG_PROPS_THUMB),
-                        'fanart': img_link.format(**IMG_PROPS_FANART)},
+                'art': {'thumb': img_link.format_map(IMG_PROPS_THUMB),
+                        'fanart': img_link.format_map(IMG_PROPS_FANART)},
                 'info': {'title': progr_name if is_playable else '[B]{}[/B]{}'.format(progr_name, content_info),
                          'plot':  description,
                          'duration': utils.iso_duration_2_seconds(item.get('duration')),
@@ -566,7 +576,7 @@ def parse_my_list_item(item, hide_paid=False):
             }
         }
         if item['contentType'] == 'FILM':
-            item_dict['show']['art']['poster'] = img_link.format(**IMG_PROPS_POSTER)
+            item_dict['show']['art']['poster'] = img_link.format_map(IMG_PROPS_POSTER)
         return item_dict
     except:
         logger.warning("Unexpected error parsing MyList item:\n", exc_info=True)
@@ -613,8 +623,8 @@ def parse_last_watched_item(item, utc_now):
         'programme_id': item['programmeId'].replace('/', '_'),
         'show': {
             'label': episode_name or progr_name,
-            'art': {'thumb': img_link.format(**IMG_PROPS_THUMB),
-                    'fanart': img_link.format(**IMG_PROPS_FANART)},
+            'art': {'thumb': img_link.format_map(IMG_PROPS_THUMB),
+                    'fanart': img_link.format_map(IMG_PROPS_FANART)},
             'info': {'title': title ,
                      'plot': info,
                      'sorttitle': sort_title(title),
@@ -636,5 +646,5 @@ def parse_last_watched_item(item, utc_now):
         }
     }
     if item['contentType'] == 'FILM':
-        item_dict['show']['art']['poster'] = img_link.format(**IMG_PROPS_POSTER)
+        item_dict['show']['art']['poster'] = img_link.format_map(IMG_PROPS_POSTER)
     return item_dict
\ No newline at end of file
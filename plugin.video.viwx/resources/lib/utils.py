@@ -10,12 +10,19 @@ import logging
 import time
 import string
 from datetime import datetime
+from functools import lru_cache
 
 from xbmcvfs import translatePath
 import xbmcaddon
 
 from codequick.support import logger_id
 
+try:
+    # Use the much faster orjson when it happens to be available in kodi's python environment.
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 
 class AddonInfo:
     def __init__(self):
@@ -195,6 +202,7 @@ def vtt_to_srt(vtt_doc: str, colourize=True) -> str:
     return srt_doc
 
 
+@lru_cache(maxsize=256)
 def duration_2_seconds(duration: str) -> int | None:
     """Convert a string containing duration in various formats to the corresponding number of seconds.
 
@@ -206,6 +214,8 @@ def duration_2_seconds(duration: str) -> int | None:
     * '1h 35m' - hours and minutes, where both hours and minutes are optional.
     * 'PT1H32M' - ISO 8601 duration.
 
+    Results are cached, since listings tend to contain many items of the same duration.
+
     """
 
     if not duration:
@@ -12,7 +12,10 @@ from unittest import TestCase
 from unittest.mock import MagicMock, patch, mock_open
 
 import json
+from http.client import RemoteDisconnected
+
 import requests
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError, ProtocolError, ReadTimeoutError
 from requests.cookies import RequestsCookieJar
 
 from resources.lib import fetch
@@ -44,6 +47,42 @@ class TestPersistentCookieJar(TestCase):
             jar.save()
             m.assert_called_once()
 
+    def test_save_is_serialised(self):
+        """Saving waits until no other thread is writing the cookie file."""
+        import threading
+        jar = fetch.PersistentCookieJar('my/file')
+        jar._has_changed = True
+        with patch('builtins.open', mock_open()) as m:
+            with fetch._cookie_file_lock:
+                t = threading.Thread(target=jar.save)
+                t.start()
+                t.join(0.2)
+                self.assertTrue(t.is_alive())
+                m.assert_not_called()
+            t.join(1)
+            self.assertFalse(t.is_alive())
+            m.assert_called_once()
+
+    def test_save_blocks_cookie_changes(self):
+        """Other threads cannot change cookies while the jar is being pickled."""
+        import pickle
+        import threading
+        jar = fetch.PersistentCookieJar('my/file')
+        jar.set('my_cookie', 'my_value', domain='.itv.com')
+        setter = threading.Thread(target=jar.set, args=('other_cookie', 'other_value'), kwargs={'domain': '.itv.com'})
+
+        def dump(obj, f, **kwargs):
+            setter.start()
+            setter.join(0.2)
+            self.assertTrue(setter.is_alive())
+            pickle.dumps(obj, **kwargs)
+
+        with patch('builtins.open', mock_open()), patch('resources.lib.fetch.pickle.dump', side_effect=dump):
+            jar.save()
+        setter.join(1)
+        self.assertFalse(setter.is_alive())
+        self.assertEqual('other_value', jar.get('other_cookie'))
+
     def test_set_cookie(self):
         jar = fetch.PersistentCookieJar('my/file')
         self.assertIs(jar._has_changed, False)
@@ -89,6 +128,54 @@ class TestHttpSession(TestCase):
         # The session's __init__() creates a cookiejar, check that it has happend only once.
         p_create.assert_called_once()
 
+    def test_http_session_created_concurrently(self):
+        """Threads requesting the session while it's being created all get the same, fully initialised instance."""
+        import threading
+        import time
+
+        def create_cookiejar():
+            time.sleep(0.2)
+            return RequestsCookieJar()
+
+        sessions = []
+
+        def get_session():
+            s = fetch.HttpSession()
+            sessions.append((s, s.cookies))
+
+        with patch('resources.lib.fetch._create_cookiejar', side_effect=create_cookiejar) as p_create:
+            threads = [threading.Thread(target=get_session) for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(2)
+        p_create.assert_called_once()
+        self.assertEqual(5, len(sessions))
+        session, jar = sessions[0]
+        for s, cookies in sessions:
+            self.assertIs(session, s)
+            self.assertIs(jar, cookies)
+
+    @patch('resources.lib.fetch._create_cookiejar')
+    def test_http_session_retries_dropped_connections(self, _):
+        s = fetch.HttpSession()
+        retries = s.get_adapter('https://www.itv.com').max_retries
+        dropped = ProtocolError('Connection aborted.', RemoteDisconnected('Remote end closed connection'))
+        # A GET request on a connection closed by the server is retried once.
+        retries = retries.increment('GET', 'https://www.itv.com', error=dropped)
+        self.assertRaises(MaxRetryError, retries.increment, 'GET', 'https://www.itv.com', error=dropped)
+        # Non-idempotent requests are not retried.
+        self.assertRaises(ProtocolError, s.get_adapter('https://www.itv.com').max_retries.increment,
+                          'POST', 'https://www.itv.com', error=dropped)
+        # Timeouts and failures to connect are not retried.
+        retries = s.get_adapter('https://www.itv.com').max_retries
+        read_timeout = ReadTimeoutError(None, 'https://www.itv.com', 'Read timed out')
+        self.assertRaises(ReadTimeoutError, retries.increment, 'GET', 'https://www.itv.com', error=read_timeout)
+        for error in (ConnectTimeoutError('Connection timed out'), NewConnectionError(None, 'Name or service not known')):
+            with self.assertRaises(MaxRetryError) as cm:
+                retries.increment('GET', 'https://www.itv.com', error=error)
+            self.assertIs(error, cm.exception.reason)
+
     def test_http_session_non_existing_cookie_file(self):
         fetch.HttpSession.instance = None  # remove a possible existing instance
         with patch.object(utils.addon_info, 'profile', new='my/non/existing/path/'):
@@ -325,3 +412,16 @@ class GetDocument(TestCase):
     def test_get_document_no_response(self, _):
         resp = fetch.get_document(URL)
         self.assertEqual('', resp)
+
+
+class GetDocumentBytes(TestCase):
+    @patch("resources.lib.fetch.web_request", return_value=HttpResponse(content='blåbla'.encode('utf8')))
+    def test_document_bytes_plain_with_response(self, mocked_req):
+        resp = fetch.get_document_bytes(URL)
+        mocked_req.assert_called_once_with('GET', URL, None)
+        self.assertEqual('blåbla'.encode('utf8'), resp)
+
+    @patch("resources.lib.fetch.web_request", return_value=HttpResponse(content=b'blabla'))
+    def test_get_document_bytes_adds_extra_headers(self, mocked_req):
+        fetch.get_document_bytes(URL, {'MyHeader': 'myval'})
+        has_keys(mocked_req.call_args[0][2], 'MyHeader')
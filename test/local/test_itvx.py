@@ -12,9 +12,11 @@ from unittest import TestCase
 from unittest.mock import patch
 import types
 import time
+import threading
 import pytz
+import requests
 
-from test.support.testutils import open_json, open_doc, HttpResponse
+from test.support.testutils import open_json, open_doc, open_binary, HttpResponse
 from test.support.object_checks import has_keys, is_li_compatible_dict, is_url, is_not_empty
 
 from resources.lib import itvx, errors, main, cache, parsex, itv_account
@@ -33,7 +35,7 @@ def check_item(testcase, item):
 
 
 @patch('resources.lib.cache.set_item')
-@patch('resources.lib.fetch.get_document', return_value=open_doc('html/index.html')())
+@patch('resources.lib.fetch.get_document_bytes', return_value=open_binary('html/index.html')())
 class GetPageData(TestCase):
     @patch('resources.lib.cache.get_item', return_value="Cached data")
     def test_get_page_data(self, p_get_item, p_get_doc, p_set_item):
@@ -105,6 +107,37 @@ class NowNextSchedule(TestCase):
             self.assertEqual('09:20 pm', start_time.lower())
 
 
+class LiveChannels(TestCase):
+    def setUp(self):
+        cache.purge()
+
+    def test_get_live_channels(self):
+        """The full schedule is requested from a worker thread, while now/next is requested on the calling thread."""
+        calls = {}
+
+        def get_json(url, *args, **kwargs):
+            if url.startswith('https://nownext.oasvc.itv.com'):
+                calls['now_next'] = threading.current_thread()
+                return open_json('schedule/now_next.json')
+            else:
+                calls['full_schedule'] = threading.current_thread()
+                return open_json('schedule/live_4hrs.json')
+
+        with patch('resources.lib.fetch.get_json', side_effect=get_json):
+            channels = itvx.get_live_channels()
+
+        this_thread = threading.current_thread()
+        self.assertIs(this_thread, calls['now_next'])
+        self.assertIsNot(this_thread, calls['full_schedule'])
+
+        # Main channels have the full schedule, other channels only now and next.
+        for channel in channels:
+            if channel['channelType'] == 'simulcast':
+                self.assertGreater(len(channel['slot']), 2)
+            else:
+                self.assertLessEqual(len(channel['slot']), 2)
+
+
 class MainPageItem(TestCase):
     def test_list_main_page_items(self):
         page_data = open_json('html/index-data.json')
@@ -321,14 +354,14 @@ class Categories(TestCase):
 
 
 class Episodes(TestCase):
-    @patch('resources.lib.fetch.get_document', new=open_doc('html/series_miss-marple.html'))
+    @patch('resources.lib.fetch.get_document_bytes', new=open_binary('html/series_miss-marple.html'))
     def test_episodes_marple(self):
         series_listing, programme_id = itvx.episodes('asd')
         self.assertIsInstance(series_listing, dict)
         self.assertEqual(len(series_listing), 6)
         self.assertTrue(is_not_empty(programme_id, str))
 
-    @patch('resources.lib.fetch.get_document', new=open_doc('html/paid_episode_downton-abbey-s1e1.html'))
+    @patch('resources.lib.fetch.get_document_bytes', new=open_binary('html/paid_episode_downton-abbey-s1e1.html'))
     def test_paid_episodes(self):
         series_listing, programme_id = itvx.episodes('asd')
         self.assertIsInstance(series_listing, dict)
@@ -336,7 +369,7 @@ class Episodes(TestCase):
         self.assertEqual(7, len(series_listing['1']['episodes']))
         self.assertTrue(is_not_empty(programme_id, str))
 
-    @patch('resources.lib.fetch.get_document', return_value=open_doc('html/series_miss-marple.html')())
+    @patch('resources.lib.fetch.get_document_bytes', return_value=open_binary('html/series_miss-marple.html')())
     def test_episodes_with_cache(self, _):
         series_listing1, programme_id1 = itvx.episodes('asd', use_cache=False)
         self.assertIsInstance(series_listing1, dict)
@@ -394,15 +427,28 @@ class Search(TestCase):
         result = itvx.search('xprs')
         self.assertIsNone(result)
 
-    @patch('requests.get')
+    @patch('resources.lib.fetch.web_request')
     def test_search_hide_paid(self, p_get):
         itvx.search('xprs')
-        url = p_get.call_args.args[0]
+        url = p_get.call_args.args[1]
         self.assertTrue('onlyFree=false' in url)
         itvx.search('xprs', hide_paid=True)
-        url = p_get.call_args.args[0]
+        url = p_get.call_args.args[1]
         self.assertTrue('onlyFree=true' in url)
 
+    def test_search_http_error(self):
+        for resp in (HttpResponse(404),
+                     HttpResponse(500),
+                     HttpResponse(401),
+                     HttpResponse(403, content=b'{"Message": "Outside Of Allowed Geographic Region"}'),
+                     HttpResponse(403, content=b'{"Message": "User does not have entitlements"}')):
+            with patch('requests.sessions.Session.send', return_value=resp):
+                self.assertIsNone(itvx.search('xprs'))
+
+    @patch('requests.sessions.Session.send', side_effect=requests.ConnectionError)
+    def test_search_connection_error(self, _):
+        self.assertRaises(errors.FetchError, itvx.search, 'xprs')
+
 
 class LastWatched(TestCase):
     @patch('resources.lib.itv_account.fetch_authenticated', return_value=open_json('usercontent/last_watched_all.json'))
@@ -444,12 +490,12 @@ class LastWatched(TestCase):
 
 
 class GetPLaylistUrl(TestCase):
-    @patch('resources.lib.fetch.get_document', new=open_doc('html/film_danny-collins.html'))
+    @patch('resources.lib.fetch.get_document_bytes', new=open_binary('html/film_danny-collins.html'))
     def test_get_playlist_from_film_page(self):
         result = itvx.get_playlist_url_from_episode_page('page')
         self.assertTrue(is_url(result))
 
-    @patch('resources.lib.fetch.get_document', new=open_doc('html/paid_episode_downton-abbey-s1e1.html'))
+    @patch('resources.lib.fetch.get_document_bytes', new=open_binary('html/paid_episode_downton-abbey-s1e1.html'))
     def test_get_playlist_from_premium_episode(self):
         result = itvx.get_playlist_url_from_episode_page('page')
         self.assertTrue(is_url(result))
@@ -460,7 +506,7 @@ class GetPLaylistUrl(TestCase):
         result = itvx.get_playlist_url_from_episode_page('page')
         self.assertTrue(is_url(result))
 
-    @patch('resources.lib.fetch.get_document', new=open_doc('html/news-short_item.html'))
+    @patch('resources.lib.fetch.get_document_bytes', new=open_binary('html/news-short_item.html'))
     def test_get_playlist_from_news_shortform_item(self):
         result = itvx.get_playlist_url_from_episode_page('page')
         self.assertTrue(is_url(result))
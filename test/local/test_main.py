@@ -57,9 +57,19 @@ class MainMenu(TestCase):
         self.assertTrue(items[0].label == 'My itvX')
 
 
+def get_live_schedules(url, *args, **kwargs):
+    """Return now/next or full schedule, depending on the url. The two schedules are
+    requested concurrently, so the order of requests is not fixed.
+
+    """
+    if url.startswith('https://nownext.oasvc.itv.com'):
+        return open_json('schedule/now_next.json')
+    else:
+        return open_json('schedule/live_4hrs.json')
+
+
 class LiveChannels(TestCase):
-    @patch('resources.lib.fetch.get_json', side_effect=(open_json('schedule/now_next.json'),
-                                                        open_json('schedule/live_4hrs.json')))
+    @patch('resources.lib.fetch.get_json', side_effect=get_live_schedules)
     @patch('resources.lib.kodi_utils.get_system_setting', return_value='America/Regina')
     def test_list_live_channels(self, _, mocked_get_json):
         cache.purge()
@@ -72,8 +82,7 @@ class LiveChannels(TestCase):
         main.sub_menu_live.test()
         self.assertEqual(2, mocked_get_json.call_count)
 
-    @patch('resources.lib.fetch.get_json', side_effect=(open_json('schedule/now_next.json'),
-                                                        open_json('schedule/live_4hrs.json')))
+    @patch('resources.lib.fetch.get_json', side_effect=get_live_schedules)
     @patch('resources.lib.kodi_utils.get_system_setting', side_effect=ValueError)
     def test_list_live_channels_no_tz_settings(self, _, __):
         cache.purge()
@@ -29,6 +29,9 @@ class TestScrapeJson(unittest.TestCase):
             get_page = open_doc(page)
             data = parsex.scrape_json(get_page())
             self.assertIsInstance(data, dict)
+            # Raw pages as bytes, like returned by fetch.get_document_bytes()
+            data = parsex.scrape_json(get_page().encode('utf8'))
+            self.assertIsInstance(data, dict)
 
     def test_invalid_page(self):
         # no __NEXT_DATA___
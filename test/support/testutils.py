@@ -49,6 +49,17 @@ def open_doc(doc):
     return wrapper
 
 
+def open_binary(doc):
+    """Like open_doc, but the returned object returns the contents of the file as bytes,
+    just like fetch.get_document_bytes() does.
+
+    """
+    def wrapper(*args, **kwargs):
+        with open(doc_path(doc), 'rb') as f:
+            return f.read()
+    return wrapper
+
+
 def save_json(data, filename):
     """Save a data structure in json format to a file in the test_docs directory"""
     with open(doc_path(filename), 'w') as f: